@@ -1,98 +1,254 @@
-import json
 import os
+import shutil
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    _encode = json.JSONEncoder(indent=2, ensure_ascii=False).encode
+    _decode = json.JSONDecoder().decode
+
+    def _dumps(obj: Any) -> bytes:
+        return _encode(obj).encode("utf-8")
+
+    def _loads(data: bytes) -> Any:
+        return _decode(data.decode("utf-8"))
+
+SUFFIX = ".json"
+
+# Set once the data directories have been created in this process
+_DIRS_ENSURED = False
+
+DEFAULT_OPENAI: Dict[str, Any] = {
+    "model_id": "gpt-4o",
+    "temperature": 0.7,
+    "top_k": 40,
+    "max_tokens": 1000,
+    "api_url": "https://api.openai.com/v1",
+    "api_key": "",
+    "stream": True,
+    "repair_formula_tag": True
+}
+
+
+def _atomic_write_json(path: str, obj: Any):
+    """Serialize obj once and atomically replace path with the result."""
+    data = _dumps(obj)
+    tmp = path + ".tmp"
+    with open(tmp, "wb", buffering=1 << 16) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
 class ConfigManager:
+    _singleton: Optional["ConfigManager"] = None
+
+    @classmethod
+    def instance(cls) -> "ConfigManager":
+        """Get the process-wide configuration manager."""
+        if cls._singleton is None:
+            cls._singleton = cls()
+        return cls._singleton
+
     def __init__(self):
         self.config_file = "data/config.json"
         self.assistants_dir = "data/assistants"
-        self._ensure_dirs_exist()
-        self.config = self._load_config()
+        self._assistants_cache: Optional[List[str]] = None
+        self._assistant_names: frozenset = frozenset()
+        self._assistants_mtime = -1
+        self._deferred = False
+        self._dirty = False
+        self._config: Optional[Dict[str, Any]] = None
+        self._sections: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Configuration dictionary, loaded from disk on first access."""
+        if self._config is None:
+            self._config = self._load_config()
+        return self._config
+
+    @config.setter
+    def config(self, config: Dict[str, Any]):
+        self._config = config
+        self._sections.clear()
         
     def _ensure_dirs_exist(self):
-        """Ensure all required directories exist."""
-        os.makedirs("data", exist_ok=True)
-        os.makedirs(self.assistants_dir, exist_ok=True)
-        os.makedirs("resources", exist_ok=True)
+        """Ensure all required directories exist before the first write."""
+        global _DIRS_ENSURED
+        if _DIRS_ENSURED:
+            return
+        for d in ("data", self.assistants_dir, "resources"):
+            os.makedirs(d, exist_ok=True)
+        _DIRS_ENSURED = True
         
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from disk or create default."""
-        if os.path.exists(self.config_file):
-            with open(self.config_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            # Default configuration
-            default_config = {
-                "openai": {
-                    "model_id": "gpt-4o",
-                    "temperature": 0.7,
-                    "top_k": 40,
-                    "max_tokens": 1000,
-                    "api_url": "https://api.openai.com/v1",
-                    "api_key": ""
-                },
-                "processing": {
-                    "parallelism": 3,
-                    "max_retries": 3
-                },
-                "last_assistant": "",
-                "output_format": "md"
-            }
-            self._save_config(default_config)
-            return default_config
+        try:
+            with open(self.config_file, "rb") as f:
+                return _loads(f.read())
+        except FileNotFoundError:
+            pass
+        # Default configuration
+        default_config = {
+            "openai": dict(DEFAULT_OPENAI),
+            "processing": {
+                "parallelism": 3,
+                "max_retries": 3
+            },
+            "last_assistant": "",
+            "output_format": "md"
+        }
+        self._save_config(default_config)
+        return default_config
     
     def _save_config(self, config: Dict[str, Any]):
         """Save configuration to disk."""
-        with open(self.config_file, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
+        self._ensure_dirs_exist()
+        _atomic_write_json(self.config_file, config)
             
+    def _commit(self):
+        """Save the in-memory configuration, or mark it dirty while saves are deferred."""
+        if self._deferred:
+            self._dirty = True
+        else:
+            self._save_config(self.config)
+
+    def flush(self):
+        """Write pending configuration changes to disk."""
+        if self._dirty:
+            self._save_config(self.config)
+            self._dirty = False
+
+    @contextmanager
+    def defer_saves(self):
+        """Batch configuration changes into a single write on exit."""
+        if self._deferred:
+            yield self
+            return
+        self._deferred = True
+        self._dirty = False
+        try:
+            yield self
+        finally:
+            self._deferred = False
+            self.flush()
+
     def update_config(self, config: Dict[str, Any]):
         """Update configuration and save to disk."""
+        if config == self.config:
+            return
         self.config = config
-        self._save_config(config)
+        self._commit()
         
+    def _get_section(self, key: str) -> Dict[str, Any]:
+        """Get a top-level configuration section, memoized until the next update."""
+        section = self._sections.get(key)
+        if section is None:
+            section = self._sections[key] = self.config.get(key, {})
+        return section
+
     def get_openai_config(self) -> Dict[str, Any]:
         """Get OpenAI configuration."""
-        return self.config.get("openai", {})
+        return self._get_section("openai")
     
     def get_processing_config(self) -> Dict[str, Any]:
         """Get processing configuration."""
-        return self.config.get("processing", {})
+        return self._get_section("processing")
     
     def get_assistants(self) -> List[str]:
-        """Get list of available assistants."""
-        return [f.replace(".json", "") for f in os.listdir(self.assistants_dir) 
-                if f.endswith(".json")]
+        """Get list of available assistants, cached until the directory changes."""
+        try:
+            mtime = os.stat(self.assistants_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime == self._assistants_mtime:
+            return self._assistants_cache
+        with os.scandir(self.assistants_dir) as it:
+            assistants = [e.name[:-len(SUFFIX)] for e in it
+                          if e.is_file() and e.name.endswith(SUFFIX)]
+        self._assistants_cache = assistants
+        self._assistant_names = frozenset(assistants)
+        self._assistants_mtime = mtime
+        return assistants
+
+    def has_assistant(self, name: str) -> bool:
+        """Check whether an assistant with the given name exists."""
+        self.get_assistants()
+        return name in self._assistant_names
+
+    def _invalidate_assistants(self):
+        """Drop the cached assistant listing."""
+        self._assistants_mtime = -1
     
+    def _assistant_path(self, name: str) -> str:
+        """Get the file path of an assistant configuration."""
+        return os.path.join(self.assistants_dir, name + SUFFIX)
+
     def save_assistant(self, name: str, system_prompt: str, user_prompt: str):
         """Save assistant configuration."""
         assistant = {
             "system_prompt": system_prompt,
             "user_prompt": user_prompt
         }
-        with open(f"{self.assistants_dir}/{name}.json", "w", encoding="utf-8") as f:
-            json.dump(assistant, f, indent=2, ensure_ascii=False)
+        self._ensure_dirs_exist()
+        _atomic_write_json(self._assistant_path(name), assistant)
+        self._invalidate_assistants()
             
     def load_assistant(self, name: str) -> Optional[Dict[str, str]]:
         """Load assistant configuration."""
-        path = f"{self.assistants_dir}/{name}.json"
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return None
+        try:
+            with open(self._assistant_path(name), "rb") as f:
+                return _loads(f.read())
+        except FileNotFoundError:
+            return None
     
     def delete_assistant(self, name: str) -> bool:
         """Delete assistant configuration."""
-        path = f"{self.assistants_dir}/{name}.json"
-        if os.path.exists(path):
-            os.remove(path)
-            return True
-        return False
+        try:
+            os.remove(self._assistant_path(name))
+        except FileNotFoundError:
+            return False
+        self._invalidate_assistants()
+        return True
+    
+    def rename_assistant(self, old_name: str, new_name: str) -> bool:
+        """Rename assistant configuration in place."""
+        try:
+            os.replace(self._assistant_path(old_name), self._assistant_path(new_name))
+        except FileNotFoundError:
+            return False
+        self._invalidate_assistants()
+        with self.defer_saves():
+            if self.get_last_assistant() == old_name:
+                self.set_last_assistant(new_name)
+        return True
+    
+    def clone_assistant(self, source_name: str, new_name: str) -> bool:
+        """Copy assistant configuration under a new name."""
+        try:
+            shutil.copyfile(self._assistant_path(source_name), self._assistant_path(new_name))
+        except FileNotFoundError:
+            return False
+        self._invalidate_assistants()
+        return True
     
     def set_last_assistant(self, name: str):
         """Set last used assistant."""
+        if self.config.get("last_assistant") == name:
+            return
         self.config["last_assistant"] = name
-        self._save_config(self.config)
+        self._commit()
         
     def get_last_assistant(self) -> str:
         """Get last used assistant."""
@@ -100,8 +256,10 @@ class ConfigManager:
     
     def set_output_format(self, format_type: str):
         """Set output format (md or txt)."""
+        if self.config.get("output_format") == format_type:
+            return
         self.config["output_format"] = format_type
-        self._save_config(self.config)
+        self._commit()
         
     def get_output_format(self) -> str:
         """Get output format."""
@@ -2,12 +2,14 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QListWidget,
     QPushButton, QMessageBox, QInputDialog, QLabel
 )
+from typing import Optional
+import bisect
 from config_manager import ConfigManager
 
 class AssistantManager(QDialog):
-    def __init__(self, config_manager: ConfigManager, parent=None):
+    def __init__(self, config_manager: Optional[ConfigManager] = None, parent=None):
         super().__init__(parent)
-        self.config_manager = config_manager
+        self.config_manager = config_manager or ConfigManager.instance()
         self.setup_ui()
         
     def setup_ui(self):
@@ -54,11 +56,18 @@ class AssistantManager(QDialog):
         layout.addLayout(close_layout)
         
     def populate_assistant_list(self):
-        """Fill the list with available assistants."""
+        """Fill the list with available assistants (initial fill only)."""
+        self.assistant_list.setUpdatesEnabled(False)
         self.assistant_list.clear()
-        assistants = self.config_manager.get_assistants()
-        for assistant in assistants:
-            self.assistant_list.addItem(assistant)
+        self.assistant_list.addItems(sorted(self.config_manager.get_assistants()))
+        self.assistant_list.setUpdatesEnabled(True)
+
+    def _insert_sorted(self, name: str) -> int:
+        """Insert a list entry at its sorted position, returns its row."""
+        names = [self.assistant_list.item(row).text() for row in range(self.assistant_list.count())]
+        row = bisect.bisect(names, name)
+        self.assistant_list.insertItem(row, name)
+        return row
             
     def rename_assistant(self):
         """Rename the selected assistant."""
@@ -81,7 +90,7 @@ class AssistantManager(QDialog):
         
         if ok and new_name and new_name != current_name:
             # Check if name already exists
-            if new_name in self.config_manager.get_assistants():
+            if self.config_manager.has_assistant(new_name):
                 QMessageBox.warning(
                     self, 
                     "Name Exists", 
@@ -89,25 +98,11 @@ class AssistantManager(QDialog):
                 )
                 return
                 
-            # Get assistant data
-            assistant = self.config_manager.load_assistant(current_name)
-            if assistant:
-                # Save with new name
-                self.config_manager.save_assistant(
-                    new_name, 
-                    assistant.get("system_prompt", ""), 
-                    assistant.get("user_prompt", "")
-                )
-                
-                # Delete old assistant
-                self.config_manager.delete_assistant(current_name)
-                
-                # Update last assistant if needed
-                if self.config_manager.get_last_assistant() == current_name:
-                    self.config_manager.set_last_assistant(new_name)
-                    
-                # Refresh list
-                self.populate_assistant_list()
+            # Rename the file and update last assistant if needed
+            if self.config_manager.rename_assistant(current_name, new_name):
+                # Move the list entry to its sorted position under the new name
+                self.assistant_list.takeItem(self.assistant_list.row(current_item))
+                self.assistant_list.setCurrentRow(self._insert_sorted(new_name))
                 
     def delete_assistant(self):
         """Delete the selected assistant."""
@@ -139,8 +134,8 @@ class AssistantManager(QDialog):
             if self.config_manager.get_last_assistant() == assistant_name:
                 self.config_manager.set_last_assistant("")
                 
-            # Refresh list
-            self.populate_assistant_list()
+            # Remove the list entry
+            self.assistant_list.takeItem(self.assistant_list.row(current_item))
             
     def clone_assistant(self):
         """Clone the selected assistant."""
@@ -163,7 +158,7 @@ class AssistantManager(QDialog):
         
         if ok and new_name:
             # Check if name already exists
-            if new_name in self.config_manager.get_assistants():
+            if self.config_manager.has_assistant(new_name):
                 QMessageBox.warning(
                     self, 
                     "Name Exists", 
@@ -171,15 +166,7 @@ class AssistantManager(QDialog):
                 )
                 return
                 
-            # Get source assistant data
-            assistant = self.config_manager.load_assistant(source_name)
-            if assistant:
-                # Save with new name
-                self.config_manager.save_assistant(
-                    new_name, 
-                    assistant.get("system_prompt", ""), 
-                    assistant.get("user_prompt", "")
-                )
-                
-                # Refresh list
-                self.populate_assistant_list()
\ No newline at end of file
+            # Copy the source file under the new name
+            if self.config_manager.clone_assistant(source_name, new_name):
+                # Add the new list entry in sorted order
+                self._insert_sorted(new_name)
\ No newline at end of file
@@ -13,13 +13,17 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QGroupBox,
 )
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Tuple
+
+from config_manager import DEFAULT_OPENAI
 
 
 class ConfigDialog(QDialog):
     def __init__(self, config: Dict[str, Any], parent=None):
         super().__init__(parent)
         self.config = config.copy()
+        self._original = {**DEFAULT_OPENAI, **config}
+        self._cached_config = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -34,7 +38,7 @@ class ConfigDialog(QDialog):
         api_layout = QFormLayout(api_group)
 
         # API Key
-        self.api_key_input = QLineEdit(self.config.get("api_key", ""))
+        self.api_key_input = QLineEdit()
         self.api_key_input.setEchoMode(QLineEdit.EchoMode.Password)
         show_key_btn = QPushButton("Show")
 
@@ -44,10 +48,8 @@ class ConfigDialog(QDialog):
         show_key_btn.clicked.connect(self.toggle_api_key_visibility)
 
         # API URL
-        self.api_url_input = QLineEdit(
-            self.config.get("api_url", "https://api.openai.com/v1")
-        )
-        self.api_url_input.setPlaceholderText("https://api.openai.com/v1")
+        self.api_url_input = QLineEdit()
+        self.api_url_input.setPlaceholderText(DEFAULT_OPENAI["api_url"])
 
         api_layout.addRow("API Key:", key_layout)
         api_layout.addRow("API URL:", self.api_url_input)
@@ -57,35 +59,28 @@ class ConfigDialog(QDialog):
         model_layout = QFormLayout(model_group)
 
         # Model ID text input
-        self.model_id_input = QLineEdit(self.config.get("model_id", "gpt-4o"))
+        self.model_id_input = QLineEdit()
 
         # Temperature
         self.temperature_input = QDoubleSpinBox()
         self.temperature_input.setRange(0.0, 2.0)
         self.temperature_input.setSingleStep(0.1)
-        self.temperature_input.setValue(self.config.get("temperature", 0.7))
 
         # Top K
         self.top_k_input = QSpinBox()
         self.top_k_input.setRange(1, 100)
-        self.top_k_input.setValue(self.config.get("top_k", 100))
 
         # Max Tokens
         self.max_tokens_input = QSpinBox()
         self.max_tokens_input.setRange(0, 10000000)
         self.max_tokens_input.setSingleStep(100)
-        self.max_tokens_input.setValue(self.config.get("max_tokens", 0))
 
         # Streaming
         self.stream_checkbox = QCheckBox()
-        self.stream_checkbox.setChecked(self.config.get("stream", True))
         self.stream_checkbox.setToolTip("Enable streaming for faster responses.")
 
         # Repair Formula Tag
         self.repair_formula_tag_checkbox = QCheckBox()
-        self.repair_formula_tag_checkbox.setChecked(
-            self.config.get("repair_formula_tag", True)
-        )
         self.repair_formula_tag_checkbox.setToolTip(
             "Enable repair formula tag for better formatting."
         )
@@ -97,6 +92,21 @@ class ConfigDialog(QDialog):
         model_layout.addRow("Streaming:", self.stream_checkbox)
         model_layout.addRow("Repair Formula Tag:", self.repair_formula_tag_checkbox)
 
+        # Fill the inputs from the current configuration
+        self.set_config(self.config)
+
+        # Drop the cached configuration whenever an input changes
+        for line_edit in (self.api_key_input, self.api_url_input, self.model_id_input):
+            line_edit.textChanged.connect(self._invalidate_config)
+        for spin_box in (
+            self.temperature_input,
+            self.top_k_input,
+            self.max_tokens_input,
+        ):
+            spin_box.valueChanged.connect(self._invalidate_config)
+        for checkbox in (self.stream_checkbox, self.repair_formula_tag_checkbox):
+            checkbox.toggled.connect(self._invalidate_config)
+
         # Buttons
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
@@ -118,11 +128,55 @@ class ConfigDialog(QDialog):
             self.api_key_input.setEchoMode(QLineEdit.EchoMode.Password)
             self.sender().setText("Show")
 
+    def _bulk_set(self, setters: List[Tuple[Callable[[Any], None], Any]]):
+        """Apply widget setters with signals and repaints suspended."""
+        widgets = [setter.__self__ for setter, _ in setters]
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.setUpdatesEnabled(False)
+        try:
+            for setter, value in setters:
+                setter(value)
+        finally:
+            for widget in widgets:
+                widget.blockSignals(False)
+            self.setUpdatesEnabled(True)
+        self._invalidate_config()
+
+    def set_config(self, config: Dict[str, Any]):
+        """Fill the input widgets from a configuration."""
+        config = {**DEFAULT_OPENAI, **config}
+        self._bulk_set(
+            [
+                (self.api_key_input.setText, config["api_key"]),
+                (self.api_url_input.setText, config["api_url"]),
+                (self.model_id_input.setText, config["model_id"]),
+                (self.temperature_input.setValue, config["temperature"]),
+                (self.top_k_input.setValue, config["top_k"]),
+                (self.max_tokens_input.setValue, config["max_tokens"]),
+                (self.stream_checkbox.setChecked, config["stream"]),
+                (
+                    self.repair_formula_tag_checkbox.setChecked,
+                    config["repair_formula_tag"],
+                ),
+            ]
+        )
+
+    def _invalidate_config(self, *_):
+        """Forget the cached configuration."""
+        self._cached_config = None
+
     def get_config(self) -> Dict[str, Any]:
         """Return the current configuration."""
+        if self._cached_config is None:
+            self._cached_config = self._build_config()
+        return self._cached_config.copy()
+
+    def _build_config(self) -> Dict[str, Any]:
+        """Read the configuration from the input widgets."""
         return {
             "api_key": self.api_key_input.text().strip(),
-            "api_url": self.api_url_input.text().strip() or "https://api.openai.com/v1",
+            "api_url": self.api_url_input.text().strip() or DEFAULT_OPENAI["api_url"],
             "model_id": self.model_id_input.text().strip(),
             "temperature": self.temperature_input.value(),
             "top_k": self.top_k_input.value(),
@@ -130,3 +184,7 @@ class ConfigDialog(QDialog):
             "stream": self.stream_checkbox.isChecked(),
             "repair_formula_tag": self.repair_formula_tag_checkbox.isChecked(),
         }
+
+    def is_dirty(self) -> bool:
+        """Return True if the configuration differs from the initial one."""
+        return self.get_config() != self._original
@@ -1,7 +1,13 @@
 import os
-import tempfile
+import queue
+import functools
+import heapq
+import itertools
+import random
+import time
+import threading
 import concurrent.futures
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterable, List, Dict, Any, Optional
 from PyQt6.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -25,29 +31,187 @@ from PyQt6.QtWidgets import (
     QInputDialog,
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QIcon, QPixmap
+from PyQt6.QtGui import QIcon, QPixmap, QTextCursor
 
 from config_manager import ConfigManager
 from pdf_processor import PDFProcessor
 from openai_client import OpenAIClient
 from gui.config_dialog import ConfigDialog
 from gui.assistant_manager import AssistantManager
-import datetime
+
+# Upper bound in seconds for the computed retry backoff
+MAX_BACKOFF = 30
+
+# MIME types of image files that are sent without re-encoding
+IMAGE_MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+# Separator the model is asked to put between pages of a multi-page request
+PAGE_BREAK = "<<<PAGE_BREAK>>>"
+
+# Size of the shared worker pool; matches the maximum parallelism setting
+POOL_SIZE = 64
+
+# Requests per unit of parallelism that may hold encoded pages at once
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+
+class ConcurrencyGovernor:
+    """Limit in-flight API requests with additive-increase/multiplicative-decrease.
+
+    Each success adds ``alpha`` to a credit counter and grows the limit by one
+    permit when the credit reaches 1. A throttled request halves the limit,
+    once per congestion event: throttles of requests that started before the
+    last decrease are ignored. The limit stays within ``[1, max_concurrency]``.
+    """
+
+    def __init__(self, max_concurrency: int, alpha: float = 0.5):
+        self.max_concurrency = max(1, max_concurrency)
+        self.alpha = alpha
+        self._sem = threading.Semaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._limit = self.max_concurrency
+        self._credit = 0.0
+        # Permits to withhold on release after the limit was decreased
+        self._debt = 0
+        # Bumped on every decrease; requests remember the epoch they started in
+        self._epoch = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def acquire(self) -> int:
+        """Wait for a request slot, returns the epoch to pass to on_throttle()."""
+        self._sem.acquire()
+        with self._lock:
+            return self._epoch
+
+    def release(self):
+        """Return a request slot, unless it is owed to a limit decrease."""
+        with self._lock:
+            if self._debt:
+                self._debt -= 1
+                return
+        self._sem.release()
+
+    def on_success(self):
+        """Record a successful request, growing the limit additively."""
+        with self._lock:
+            if self._limit >= self.max_concurrency:
+                return
+            self._credit += self.alpha
+            if self._credit < 1:
+                return
+            self._credit -= 1
+            self._limit += 1
+            if self._debt:
+                self._debt -= 1
+                return
+        self._sem.release()
+
+    def on_throttle(self, epoch: Optional[int] = None):
+        """Record a rate-limited or failed request, halving the limit.
+
+        Pass the epoch returned by acquire(); the throttle is ignored if the
+        limit was already decreased since then.
+        """
+        with self._lock:
+            if epoch is not None and epoch < self._epoch:
+                return
+            self._epoch += 1
+            new_limit = max(1, self._limit // 2)
+            self._debt += self._limit - new_limit
+            self._limit = new_limit
+            self._credit = 0.0
+
+
+class RetryScheduler:
+    """Run callables after a delay from a single timer thread.
+
+    Retries are requeued through this instead of sleeping in a worker thread,
+    so the pool keeps serving other pages during backoff.
+    """
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="pdf2md-retry", daemon=True)
+        self._thread.start()
+
+    def call_later(self, delay: float, fn: Callable[[], None]):
+        """Schedule fn to run after delay seconds, or right away once stopped."""
+        with self._cond:
+            if not self._stopped:
+                heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), fn))
+                self._cond.notify()
+                return
+        fn()
+
+    def stop(self):
+        """Stop the timer thread, running anything still scheduled right away."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if self._stopped:
+                    pending = [entry[2] for entry in sorted(self._heap)]
+                    self._heap.clear()
+                    break
+                _, _, fn = heapq.heappop(self._heap)
+            fn()
+        for fn in pending:
+            fn()
+
+
+class _Request:
+    """An API request for one or more pages, tracked across retries."""
+
+    def __init__(
+        self,
+        data_urls: List[str],
+        user_prompt: str,
+        label: str,
+        on_done: Callable[[bool, str], None],
+    ):
+        self.data_urls = data_urls
+        self.user_prompt = user_prompt
+        self.label = label
+        self.on_done = on_done
+        self.retries = 0
 
 
 class ProcessingTask(QThread):
     progress_updated = pyqtSignal(int, str)
+    page_ready = pyqtSignal(str)
     processing_complete = pyqtSignal(str)
 
     def __init__(
         self,
-        images: List[str],
+        images: Iterable[bytes],
         openai_client: OpenAIClient,
         system_prompt: str,
         user_prompt: str,
         parallelism: int,
         max_retries: int,
         output_format: str,
+        governor: Optional[ConcurrencyGovernor] = None,
+        page_count: Optional[int] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+        mime_type: str = "image/jpeg",
+        pages_per_call: int = 1,
     ):
         super().__init__()
         self.images = images
@@ -57,115 +221,295 @@ class ProcessingTask(QThread):
         self.parallelism = parallelism
         self.max_retries = max_retries
         self.output_format = output_format
+        # Requests in flight are limited by the governor, so a shared pool may be larger
+        self.governor = governor or ConcurrencyGovernor(parallelism)
+        self.executor = executor
+        # Format of the image bytes, used in the data URL sent to the API
+        self.mime_type = mime_type
+        # Pages sent together in one request when the model accepts several images
+        self.pages_per_call = max(1, pages_per_call)
+        # Number of pages expected, for progress reporting
+        self.page_count = page_count if page_count is not None else len(images)
         self.separator = "\n\n"
+        # Limits batches submitted but not finished, so encoded pages don't pile up in memory
+        self._in_flight = threading.BoundedSemaphore(
+            BATCHES_IN_FLIGHT_PER_WORKER * max(1, parallelism)
+        )
+        # Set by cancel(); pending requests then fail instead of calling the API
+        self._cancelled = threading.Event()
+        self._scheduler: Optional[RetryScheduler] = None
+        # Finished batches arrive here as (first_idx, size, future); (None, count, error)
+        # ends submission and None is put by cancel()
+        self._done_queue: queue.Queue = queue.Queue()
+
+    def cancel(self):
+        """Stop processing: fail every pending request and abort those in progress.
+
+        run() returns right away without waiting for the aborted requests.
+        """
+        self._cancelled.set()
+        if self._scheduler is not None:
+            # Waiting retries are sent now, and fail because of the flag
+            self._scheduler.stop()
+        self.openai_client.abort()
+        self._done_queue.put(None)
 
     def run(self):
-        results = []
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.parallelism) as executor:
-            # Create future for each image
-            future_to_image = {
-                executor.submit(self.process_image, image_path, idx): (image_path, idx)
-                for idx, image_path in enumerate(self.images)
-            }
+        done_queue = self._done_queue
+        # Finished (success, text) results by page index; slots are cleared once emitted
+        results: List[Optional[tuple]] = [None] * self.page_count
+        next_idx = 0
+        completed = 0
+        failed = 0
+        submitted = None
+        feed_error = None
+
+        # Use the shared pool if one was given, otherwise one just for this run
+        executor = self.executor or concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.parallelism
+        )
+        self._executor = executor
+        self._scheduler = RetryScheduler()
+        if self._cancelled.is_set():
+            self._scheduler.stop()
+        try:
+            # Submit pages from a separate thread so rendering overlaps with API calls
+            feeder = threading.Thread(
+                target=self.submit_images, args=(executor, done_queue), daemon=True
+            )
+            feeder.start()
 
             # Process results as they complete
-            for i, future in enumerate(concurrent.futures.as_completed(future_to_image)):
-                image_path, idx = future_to_image[future]
-                page_num = idx + 1
+            while submitted is None or completed < submitted:
+                item = done_queue.get()
+                if item is None:
+                    break
+                if item[0] is None:
+                    _, submitted, feed_error = item
+                    continue
+
+                first_idx, size, future = item
                 try:
-                    success, text = future.result()
-                    results.append((idx, success, text, page_num))
-
-                    # Report progress
-                    progress_percent = int((i + 1) / len(self.images) * 100)
-                    self.progress_updated.emit(
-                        progress_percent,
-                        f"Processed page {page_num}/{len(self.images)}",
-                    )
+                    batch_results = future.result()
                 except Exception as e:
-                    results.append((idx, False, str(e), page_num))
+                    batch_results = [(False, str(e))] * size
+                if first_idx + size > len(results):
+                    # The source yielded more pages than expected
+                    results.extend([None] * (first_idx + size - len(results)))
+                results[first_idx:first_idx + size] = batch_results
+                completed += size
+                page_num = first_idx + size
+
+                # Report progress
+                total = max(self.page_count, completed)
+                progress_percent = int(completed / total * 100)
+                self.progress_updated.emit(
+                    progress_percent,
+                    f"Processed page {page_num}/{total}",
+                )
+
+                # Emit every page whose predecessors are all done
+                while next_idx < len(results) and results[next_idx] is not None:
+                    success, text = results[next_idx]
+                    results[next_idx] = None
+                    if not success:
+                        failed += 1
+                    page_text = self.format_result(success, text, next_idx + 1)
+                    if next_idx > 0:
+                        page_text = self.separator + page_text
+                    self.page_ready.emit(page_text)
+                    next_idx += 1
+        finally:
+            self._scheduler.stop()
+            if executor is not self.executor:
+                executor.shutdown(wait=not self._cancelled.is_set())
+
+        # Emit a short summary; the pages themselves were already emitted
+        if self._cancelled.is_set():
+            summary = f"Cancelled after {next_idx} page(s)"
+        else:
+            summary = f"Processed {submitted} page(s)"
+        if failed:
+            summary += f", {failed} failed"
+        if feed_error is not None:
+            summary += f". Error reading input: {feed_error}"
+        self.processing_complete.emit(summary)
+
+    def submit_images(self, executor: concurrent.futures.Executor, done_queue: queue.Queue):
+        """Submit images in batches of pages_per_call as soon as the source yields them.
+
+        Blocks while too many batches are in flight, which also keeps the
+        source from rendering far ahead of the API.
+        """
+        count = 0
+        error = None
+        batch: List[bytes] = []
+        try:
+            for image_bytes in self.images:
+                if self._cancelled.is_set():
+                    break
+                batch.append(image_bytes)
+                if len(batch) == self.pages_per_call:
+                    self._submit_batch(done_queue, batch, count)
+                    count += len(batch)
+                    batch = []
+        except Exception as e:
+            error = e
+        if batch:
+            self._submit_batch(done_queue, batch, count)
+            count += len(batch)
+        if self._cancelled.is_set() and hasattr(self.images, "close"):
+            # Stop rendering pages that will never be sent
+            self.images.close()
+        done_queue.put((None, count, error))
+
+    def _submit_batch(self, done_queue: queue.Queue, batch: List[bytes], first_idx: int):
+        self._in_flight.acquire()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        future.add_done_callback(
+            functools.partial(self._put_done, done_queue, first_idx, len(batch))
+        )
+        self.process_batch(batch, first_idx, future.set_result)
+
+    def _put_done(
+        self, done_queue: queue.Queue, first_idx: int, size: int, future: concurrent.futures.Future
+    ):
+        self._in_flight.release()
+        done_queue.put((first_idx, size, future))
 
-        # Sort results by original index
-        results.sort(key=lambda x: x[0])
+    def process_image(self, image_bytes: bytes, idx: int, on_done: Callable[[bool, str], None]):
+        """Process a single image with retry logic, calling on_done(success, text) when finished."""
+        # Encode once; every retry sends the same payload
+        data_url = OpenAIClient.encode_image(image_bytes, self.mime_type)
+        self.send(_Request([data_url], self.user_prompt, f"page {idx + 1}", on_done))
 
-        # Combine all results
-        final_text = self.format_results(results)
+    def process_batch(
+        self, batch: List[bytes], first_idx: int, on_done: Callable[[List[tuple]], None]
+    ):
+        """Process consecutive images in one request, calling on_done with one result per image."""
+        if len(batch) == 1:
+            self.process_image(batch[0], first_idx, lambda success, text: on_done([(success, text)]))
+            return
 
-        # Emit signal with final result
-        self.processing_complete.emit(final_text)
+        data_urls = [OpenAIClient.encode_image(image_bytes, self.mime_type) for image_bytes in batch]
+        user_prompt = f"{self.user_prompt}\nReturn each page separated by {PAGE_BREAK}."
+        label = f"pages {first_idx + 1}-{first_idx + len(batch)}"
+        self.send(
+            _Request(
+                data_urls,
+                user_prompt,
+                label,
+                functools.partial(self._batch_finished, batch, first_idx, on_done),
+            )
+        )
 
-    def process_image(self, image_path: str, idx: int) -> tuple:
-        """Process a single image with retry logic."""
-        page_num = idx + 1
-        retries = 0
+    def _batch_finished(
+        self,
+        batch: List[bytes],
+        first_idx: int,
+        on_done: Callable[[List[tuple]], None],
+        success: bool,
+        response: str,
+    ):
+        if not success:
+            on_done([(False, response)] * len(batch))
+            return
+
+        parts = response.split(PAGE_BREAK)
+        if len(parts) == len(batch):
+            on_done([(True, part.strip()) for part in parts])
+            return
 
-        while retries <= self.max_retries:
+        # The model didn't separate the pages as asked; fall back to one page per request
+        results: List[Optional[tuple]] = [None] * len(batch)
+        remaining = [len(batch)]
+        lock = threading.Lock()
+
+        def page_finished(offset: int, success: bool, text: str):
+            with lock:
+                results[offset] = (success, text)
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            on_done(results)
+
+        for offset, image_bytes in enumerate(batch):
+            self.process_image(image_bytes, first_idx + offset, functools.partial(page_finished, offset))
+
+    def send(self, request: "_Request"):
+        """Queue an API attempt for a request on the worker pool."""
+        if self._cancelled.is_set():
+            request.on_done(False, "Cancelled")
+            return
+        try:
+            self._executor.submit(self._attempt, request)
+        except RuntimeError as e:
+            # The pool was shut down, e.g. because the window closed
+            request.on_done(False, str(e))
+
+    def _attempt(self, request: "_Request"):
+        """Make one API attempt, scheduling a retry instead of sleeping on failure."""
+        epoch = None
+        try:
+            # Process with OpenAI, within the governor's concurrency limit
+            epoch = self.governor.acquire()
             try:
-                # Load image
-                image_bytes = PDFProcessor.load_image(image_path)
-
-                # Process with OpenAI
-                success, response = self.openai_client.process_image(image_bytes, self.system_prompt, self.user_prompt)
-
-                if success:
-                    return True, response
-
-                # If failed, increment retry counter
-                retries += 1
-                if retries <= self.max_retries:
-                    # Wait before retrying (exponential backoff)
-                    wait_time = 2**retries
-                    self.progress_updated.emit(
-                        -1,
-                        f"Retrying page {page_num} (attempt {retries}/{self.max_retries})...",
-                    )
-                    self.msleep(wait_time * 1000)
+                if self._cancelled.is_set():
+                    # Checked after waiting for a slot, which may have taken a while
+                    success, response, retry_after, error_kind = False, "Cancelled", None, "fatal"
                 else:
-                    # Max retries exceeded
-                    return False, response
-
-            except Exception as e:
-                retries += 1
-                if retries <= self.max_retries:
-                    # Wait before retrying
-                    wait_time = 2**retries
-                    self.progress_updated.emit(
-                        -1,
-                        f"Error on page {page_num}, retrying (attempt {retries}/{self.max_retries})...",
+                    success, response, retry_after, error_kind = self.openai_client.process_images(
+                        request.data_urls, self.system_prompt, request.user_prompt
                     )
-                    self.msleep(wait_time * 1000)
-                else:
-                    # Max retries exceeded
-                    return False, str(e)
-
-        # Should never reach here, but just in case
-        return False, "Maximum retries exceeded"
-
-    def format_results(self, results: List[tuple]) -> str:
-        """Format processing results based on output format."""
-        output = []
-
-        for _, success, text, page_num in results:
-            if success:
-                output.append(text)
-            else:
-                # Format error as markdown quote or plain text
-                if self.output_format == "md":
-                    error_text = f"> **Error processing page {page_num}:**\n>\n> ```json\n> {text}\n> ```"
-                else:
-                    error_text = f"--- Error processing page {page_num} ---\n\n{text}\n\n---"
-                output.append(error_text)
+            finally:
+                self.governor.release()
+        except Exception as e:
+            success, response, retry_after, error_kind = False, str(e), None, "exception"
+
+        if success:
+            self.governor.on_success()
+            request.on_done(True, response)
+            return
+        if error_kind == "throttle":
+            self.governor.on_throttle(epoch)
 
-        # # Join all outputs with separator
-        # if self.output_format == "md":
-        #     separator = "\n\n---\n\n"
-        # else:
-        #     separator = "\n\n==========\n\n"
+        # Errors such as bad requests or auth failures won't go away on retry
+        if error_kind == "fatal" or request.retries >= self.max_retries:
+            request.on_done(False, response)
+            return
 
-        separator = self.separator
+        # Requeue after the server-requested delay, or exponential backoff,
+        # so the worker thread is free for other pages in the meantime
+        request.retries += 1
+        wait_time = self.backoff_time(request.retries, retry_after)
+        if error_kind == "exception":
+            message = f"Error on {request.label}, retrying (attempt {request.retries}/{self.max_retries})..."
+        else:
+            message = f"Retrying {request.label} (attempt {request.retries}/{self.max_retries})..."
+        self.progress_updated.emit(-1, message)
+        self._scheduler.call_later(wait_time, functools.partial(self.send, request))
+
+    @staticmethod
+    def backoff_time(retries: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before a retry.
+
+        Uses the server-provided delay when there is one, otherwise exponential
+        backoff with jitter so parallel workers don't retry in lockstep.
+        """
+        if retry_after is not None:
+            return retry_after
+        base = 2**retries
+        return min(base + random.uniform(0, 0.5 * base), MAX_BACKOFF)
+
+    def format_result(self, success: bool, text: str, page_num: int) -> str:
+        """Format a single page result based on output format."""
+        if success:
+            return text
 
-        return separator.join(output)
+        # Format error as markdown quote or plain text
+        if self.output_format == "md":
+            return f"> **Error processing page {page_num}:**\n>\n> ```json\n> {text}\n> ```"
+        return f"--- Error processing page {page_num} ---\n\n{text}\n\n---"
 
 
 class MainWindow(QMainWindow):
@@ -173,16 +517,20 @@ class MainWindow(QMainWindow):
         super().__init__()
 
         # Initialize configuration
-        self.config_manager = ConfigManager()
+        self.config_manager = ConfigManager.instance()
         openai_config = self.config_manager.get_openai_config()
         self.openai_client = OpenAIClient(openai_config)
 
+        # Worker threads shared by all processing runs
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=POOL_SIZE, thread_name_prefix="pdf2md"
+        )
+
         # Set up UI
         self.setup_ui()
 
         # Initialize state variables
         self.current_file = None
-        self.image_paths = []
         self.processing_task = None
 
         # Load assistant
@@ -268,8 +616,15 @@ class MainWindow(QMainWindow):
         self.parallelism_spin.setRange(1, 64)
         self.parallelism_spin.setValue(self.config_manager.get_processing_config().get("parallelism", 3))
 
+        self.pages_per_call_spin = QSpinBox()
+        self.pages_per_call_spin.setRange(1, 10)
+        self.pages_per_call_spin.setValue(self.config_manager.get_processing_config().get("pages_per_call", 1))
+        self.pages_per_call_spin.setToolTip("Pages sent in one request; requires a model that accepts multiple images.")
+
         parallelism_inner.addWidget(QLabel("Concurrent tasks:"))
         parallelism_inner.addWidget(self.parallelism_spin)
+        parallelism_inner.addWidget(QLabel("Pages per request:"))
+        parallelism_inner.addWidget(self.pages_per_call_spin)
 
         # Retry settings
         retry_group = QGroupBox("Retry Options")
@@ -375,9 +730,7 @@ class MainWindow(QMainWindow):
     def refresh_assistant_list(self):
         """Refresh the assistant combo box with current assistants."""
         self.assistant_combo.clear()
-        assistants = self.config_manager.get_assistants()
-        for assistant in assistants:
-            self.assistant_combo.addItem(assistant)
+        self.assistant_combo.addItems(self.config_manager.get_assistants())
 
     def load_selected_assistant(self, assistant_name: str):
         """Load the selected assistant's prompts."""
@@ -394,7 +747,7 @@ class MainWindow(QMainWindow):
     def load_last_assistant(self):
         """Load the last used assistant."""
         last_assistant = self.config_manager.get_last_assistant()
-        if last_assistant and last_assistant in self.config_manager.get_assistants():
+        if last_assistant and self.config_manager.has_assistant(last_assistant):
             self.assistant_combo.setCurrentText(last_assistant)
             # set the prompts
             self.load_selected_assistant(last_assistant)
@@ -405,7 +758,7 @@ class MainWindow(QMainWindow):
 
         if ok and name:
             # Check if assistant already exists
-            if name in self.config_manager.get_assistants():
+            if self.config_manager.has_assistant(name):
                 QMessageBox.warning(
                     self,
                     "Assistant Exists",
@@ -449,7 +802,7 @@ class MainWindow(QMainWindow):
     def configure_openai(self):
         """Open OpenAI configuration dialog."""
         dialog = ConfigDialog(self.config_manager.get_openai_config(), self)
-        if dialog.exec():
+        if dialog.exec() and dialog.is_dirty():
             # Update config with new values
             new_config = dialog.get_config()
             self.config_manager.update_config(
@@ -495,12 +848,17 @@ class MainWindow(QMainWindow):
         # Get processing settings
         parallelism = self.parallelism_spin.value()
         max_retries = self.retry_spin.value()
+        pages_per_call = self.pages_per_call_spin.value()
 
         # Update processing config
         self.config_manager.update_config(
             {
                 "openai": self.config_manager.get_openai_config(),
-                "processing": {"parallelism": parallelism, "max_retries": max_retries},
+                "processing": {
+                    "parallelism": parallelism,
+                    "max_retries": max_retries,
+                    "pages_per_call": pages_per_call,
+                },
                 "last_assistant": self.config_manager.get_last_assistant(),
                 "output_format": "md" if self.md_radio.isChecked() else "txt",
             }
@@ -525,6 +883,9 @@ class MainWindow(QMainWindow):
 
         # Check if input is PDF or image
         file_ext = os.path.splitext(self.current_file)[1].lower()
+        images: Iterable[bytes] = []
+        page_count = 0
+        mime_type = "image/jpeg"
 
         if file_ext in [".pptx", ".ppt"]:
             # convert to PDF first
@@ -533,30 +894,35 @@ class MainWindow(QMainWindow):
             
             
         elif file_ext == ".pdf":
-            # Convert PDF to images
+            # Render PDF pages to JPEG in memory; pages are sent as soon as they are rendered
             self.progress_status.setText("Converting PDF to images...")
-            os.makedirs("./tmp", exist_ok=True)
-            self.image_paths = PDFProcessor.convert_pdf_to_images(
-                self.current_file,
-                f"./tmp/{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}",
-            )
+            page_count = PDFProcessor.get_page_count(self.current_file)
+            images = PDFProcessor.iter_pdf_page_jpegs(self.current_file)
         else:
-            # Single image file
-            self.image_paths = [self.current_file]
+            # Single image file, sent as-is; read once and reused on every retry
+            with open(self.current_file, "rb") as f:
+                images = [f.read()]
+            page_count = 1
+            mime_type = IMAGE_MIME_TYPES.get(file_ext, mime_type)
 
         # Start processing task
         self.processing_task = ProcessingTask(
-            self.image_paths,
+            images,
             self.openai_client,
             system_prompt,
             user_prompt,
             parallelism,
             max_retries,
             output_format,
+            page_count=page_count,
+            executor=self._pool,
+            mime_type=mime_type,
+            pages_per_call=pages_per_call,
         )
 
         # Connect signals
         self.processing_task.progress_updated.connect(self.update_progress)
+        self.processing_task.page_ready.connect(self.append_page)
         self.processing_task.processing_complete.connect(self.processing_finished)
 
         # Start the task
@@ -568,37 +934,21 @@ class MainWindow(QMainWindow):
             self.progress_bar.setValue(value)
         self.progress_status.setText(message)
 
-    def processing_finished(self, result_text: str):
-        """Process completion callback."""
-        # Display result
-        self.output_text.setText(result_text)
+    def append_page(self, page_text: str):
+        """Append a finished page to the output."""
+        self.output_text.moveCursor(QTextCursor.MoveOperation.End)
+        self.output_text.insertPlainText(page_text)
 
+    def processing_finished(self, summary: str):
+        """Process completion callback."""
         # Hide progress bar, update status
         self.progress_bar.setVisible(False)
-        self.progress_status.setText("Processing complete!")
+        self.progress_status.setText(f"Processing complete! {summary}")
 
         # Re-enable buttons
         self.process_btn.setEnabled(True)
         self.save_output_btn.setEnabled(True)
 
-        # Clean up temporary images (not for single image mode)
-        if len(self.image_paths) > 1:
-            try:
-                # Get directory of first image
-                image_dir = os.path.dirname(self.image_paths[0])
-
-                # Check if it's a temporary directory
-                if tempfile.gettempdir() in image_dir:
-                    for image_path in self.image_paths:
-                        if os.path.exists(image_path):
-                            os.remove(image_path)
-
-                    # Remove the directory if it's empty
-                    if os.path.exists(image_dir) and not os.listdir(image_dir):
-                        os.rmdir(image_dir)
-            except Exception as e:
-                print(f"Error cleaning up temporary files: {e}")
-
     def save_output(self):
         """Save the output to a file."""
         if not self.output_text.toPlainText():
@@ -626,3 +976,12 @@ class MainWindow(QMainWindow):
                     "Error Saving Output",
                     f"An error occurred while saving the output: {str(e)}",
                 )
+
+    def closeEvent(self, event):
+        """Stop any running task, then the worker pool, when the window closes."""
+        if self.processing_task is not None and self.processing_task.isRunning():
+            # The task returns as soon as it is cancelled, so this doesn't block for long
+            self.processing_task.cancel()
+            self.processing_task.wait()
+        self._pool.shutdown(wait=False)
+        super().closeEvent(event)
@@ -1,59 +1,184 @@
-from typing import Dict, Any, Optional, Tuple
-import base64
+from typing import Dict, Any, List, Optional, Tuple
+import binascii
+import importlib.util
 import json
-from openai import OpenAI
+import re
+import threading
+import httpx
+from openai import OpenAI, APIStatusError
+
+from config_manager import DEFAULT_OPENAI
+
+# HTTP/2 lets parallel page requests share connections; it needs the h2 package
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Connection pool shared by all page requests
+MAX_CONNECTIONS = 64
+
+# Responses may take minutes before the first byte, especially for multi-page requests
+TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+# HTTP statuses that will not succeed on retry (bad request, auth, not found)
+UNRECOVERABLE_STATUS = {400, 401, 403, 404}
+
+# LaTeX delimiters rewritten to Markdown math when repair_formula_tag is set
+_FORMULA_SUB = {"\\(": "$", "\\)": "$", "\\[": "$$", "\\]": "$$"}
+_FORMULA_RE = re.compile("|".join(map(re.escape, _FORMULA_SUB)))
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _b64(data: bytes) -> str:
+    """Base64-encode bytes using binascii directly, skipping base64.b64encode's wrapper."""
+    return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse a rate-limit reset duration such as "1s", "6m0s" or "20ms"."""
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _retry_after(error: APIStatusError) -> Optional[float]:
+    """Get the server-suggested wait in seconds from a failed response."""
+    headers = error.response.headers
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    reset = headers.get("x-ratelimit-reset-requests")
+    if reset:
+        return _parse_duration(reset)
+    return None
+
+
+def _error_kind(error: APIStatusError) -> str:
+    """Classify an API error as "throttle", "fatal" or "error"."""
+    if error.status_code == 429 or error.status_code >= 500:
+        return "throttle"
+    if error.status_code in UNRECOVERABLE_STATUS:
+        return "fatal"
+    return "error"
 
 
 class OpenAIClient:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
+        self._system_tmpl: Optional[Dict[str, Any]] = None
+        self._system_tmpl_prompt: Optional[str] = None
+        # Requests in progress, and replaced HTTP clients to close once there are none
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._retired: List[httpx.Client] = []
         self.setup_client()
 
     def setup_client(self):
         """Configure the client with current settings."""
-        self.model_id = self.config.get("model_id", "gpt-4o")
-        self.temperature = self.config.get("temperature", 0.7)
-        self.max_tokens = self.config.get("max_tokens", 0)
-        self.top_k = self.config.get("top_k", 100)
-        self.api_key = self.config.get("api_key", "")
-        self.api_url = self.config.get("api_url", "https://api.openai.com/v1")
-        self.stream = self.config.get("stream", True)
-        self.repair_formula_tag = self.config.get("repair_formula_tag", True)
-        self.client = OpenAI(api_key=self.api_key, base_url=self.api_url)
+        # Keys missing from the config fall back to the same defaults the settings use
+        config = {**DEFAULT_OPENAI, **self.config}
+        self.model_id = config["model_id"]
+        self.temperature = config["temperature"]
+        self.max_tokens = config["max_tokens"]
+        self.top_k = config["top_k"]
+        self.api_key = config["api_key"]
+        self.api_url = config["api_url"]
+        self.stream = config["stream"]
+        self.repair_formula_tag = config["repair_formula_tag"]
+        self._httpx = httpx.Client(
+            http2=HTTP2,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            ),
+            timeout=TIMEOUT,
+        )
+        # Retries are handled by the caller, which also adapts concurrency to throttling
+        self.client = OpenAI(
+            api_key=self.api_key, base_url=self.api_url, http_client=self._httpx, max_retries=0
+        )
 
     def update_config(self, config: Dict[str, Any]):
-        """Update client configuration."""
-        self.config = config
-        self.setup_client()
+        """Update client configuration.
 
-    def process_image(
-        self, image_bytes: bytes, system_prompt: str, user_prompt: str
-    ) -> Tuple[bool, str]:
+        Requests already in progress keep using the old HTTP client, which is
+        closed when the last of them finishes.
         """
-        Send image with prompts to OpenAI API using the openai package.
-        Embeds the image (base64 encoded) in markdown format.
-        Returns tuple of (success, response_text)
+        with self._lock:
+            if self._in_flight:
+                self._retired.append(self._httpx)
+            else:
+                self._httpx.close()
+            self.config = config
+            self.setup_client()
+
+    def abort(self):
+        """Abort the requests in progress by closing their HTTP clients.
+
+        Later requests use a new HTTP client.
         """
-        # Encode image as base64 and embed in markdown image syntax.
-        base64_image = base64.b64encode(image_bytes).decode("utf-8")
+        with self._lock:
+            http_clients = [self._httpx, *self._retired]
+            self._retired = []
+            self.setup_client()
+        for http_client in http_clients:
+            http_client.close()
 
-        messages = [
-            {
+    def _request_finished(self):
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight:
+                return
+            retired, self._retired = self._retired, []
+        for http_client in retired:
+            http_client.close()
+
+    @staticmethod
+    def encode_image(image_bytes: bytes, mime_type: str = "image/jpeg") -> str:
+        """Encode image bytes as a base64 data URL for the API."""
+        return f"data:{mime_type};base64," + _b64(image_bytes)
+
+    def _system_message(self, system_prompt: str) -> Dict[str, Any]:
+        """Return the system message, rebuilt only when the prompt changes."""
+        if self._system_tmpl is None or self._system_tmpl_prompt != system_prompt:
+            self._system_tmpl = {
                 "role": "system",
                 "content": [
                     {"type": "text", "text": system_prompt},
                 ],
-            },
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{base64_image}"},
-                    },
-                    {"type": "text", "text": user_prompt},
-                ],
-            },
+            }
+            self._system_tmpl_prompt = system_prompt
+        return self._system_tmpl
+
+    def process_image(
+        self, data_url: str, system_prompt: str, user_prompt: str
+    ) -> Tuple[bool, str, Optional[float], Optional[str]]:
+        """Send a single image with prompts to OpenAI API, see process_images()."""
+        return self.process_images([data_url], system_prompt, user_prompt)
+
+    def process_images(
+        self, data_urls: List[str], system_prompt: str, user_prompt: str
+    ) -> Tuple[bool, str, Optional[float], Optional[str]]:
+        """
+        Send images with prompts to OpenAI API using the openai package.
+        Images are passed as base64 data URLs, see encode_image(), and all
+        go into a single user turn. max_tokens applies per image.
+        Returns tuple of (success, response_text, retry_after_seconds, error_kind),
+        where error_kind is None on success, "throttle" for rate limits and
+        server errors, "fatal" for errors that should not be retried, or
+        "error" otherwise.
+        """
+        content: List[Dict[str, Any]] = [
+            {"type": "image_url", "image_url": {"url": data_url}} for data_url in data_urls
+        ]
+        content.append({"type": "text", "text": user_prompt})
+        messages = [
+            self._system_message(system_prompt),
+            {"role": "user", "content": content},
         ]
 
         params = {
@@ -64,40 +189,41 @@ class OpenAIClient:
             "stream": self.stream,
         }
         if self.max_tokens > 0:
-            params["max_tokens"] = self.max_tokens
+            # The limit is per page; a multi-page request needs room for every page
+            params["max_tokens"] = self.max_tokens * len(data_urls)
 
-        if "stream" in params and params["stream"]:
-            try:
-                completion = self.client.chat.completions.create(**params)
-                message_content = ""
+        with self._lock:
+            self._in_flight += 1
+            client = self.client
+        try:
+            completion = client.chat.completions.create(**params)
+            if params["stream"]:
+                parts = []
                 for chunk in completion:
-                    if chunk.choices[0].delta.content is None:
+                    delta = chunk.choices[0].delta.content
+                    if delta is None:
                         continue
-                    message_content += chunk.choices[0].delta.content
-                #     print(chunk.choices[0].delta.content, end="")
+                    parts.append(delta)
+                #     print(delta, end="")
                 # print()
-                if self.repair_formula_tag:
-                    message_content = (
-                        message_content.replace("\\(", "$")
-                        .replace("\\)", "$")
-                        .replace("\\[", "$$")
-                        .replace("\\]", "$$")
-                    )
-                return True, message_content
-            except Exception as e:
-                return False, str(e)
-        else:
-            try:
-                completion = self.client.chat.completions.create(**params)
+                if not parts:
+                    return False, "empty response", None, "error"
+                message_content = "".join(parts)
+            else:
                 message_content = completion.choices[0].message.content
                 # print(message_content)
-                if self.repair_formula_tag:
-                    message_content = (
-                        message_content.replace("\\(", "$")
-                        .replace("\\)", "$")
-                        .replace("\\[", "$$")
-                        .replace("\\]", "$$")
-                    )
-                return True, message_content
-            except Exception as e:
-                return False, str(e)
+            return True, self._finalize(message_content), None, None
+        except APIStatusError as e:
+            return False, str(e), _retry_after(e), _error_kind(e)
+        except Exception as e:
+            return False, str(e), None, "error"
+        finally:
+            self._request_finished()
+
+    def _finalize(self, message_content: str) -> str:
+        """Post-process a response, converting \\( \\) \\[ \\] formula tags to $ and $$."""
+        if self.repair_formula_tag:
+            message_content = _FORMULA_RE.sub(
+                lambda m: _FORMULA_SUB[m.group(0)], message_content
+            )
+        return message_content
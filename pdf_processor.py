@@ -1,55 +1,106 @@
 import os
-import tempfile
-from typing import List, Tuple
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 import fitz  # PyMuPDF
-from PIL import Image
-import io
 from tqdm import tqdm
 
+# Pages rendered per task submitted to a worker process
+PAGES_PER_SHARD = 4
+
+# Shards per worker that may be rendered ahead of the consumer
+SHARDS_AHEAD_PER_WORKER = 2
+
+# Below this many pages, starting worker processes costs more than it saves
+MIN_PAGES_FOR_POOL = 8
+
+
+def _render_page(pdf_document: fitz.Document, page_num: int, matrix: fitz.Matrix, jpg_quality: int) -> bytes:
+    """Render one page of an open PDF to an in-memory JPEG image."""
+    pix = pdf_document.load_page(page_num).get_pixmap(matrix=matrix, alpha=False)
+    return pix.tobytes("jpeg", jpg_quality=jpg_quality)
+
+
+def _render_shard(pdf_path: str, start: int, end: int, dpi: int, jpg_quality: int) -> List[bytes]:
+    """Render pages [start, end) of a PDF to in-memory JPEG images."""
+    # Each worker process opens its own document; PyMuPDF handles can't be shared
+    matrix = fitz.Matrix(dpi / 72, dpi / 72)
+    with fitz.open(pdf_path) as pdf_document:
+        return [_render_page(pdf_document, page_num, matrix, jpg_quality) for page_num in range(start, end)]
+
+
+def _split_pages(page_count: int, shards: int) -> List[Tuple[int, int]]:
+    """Split range(page_count) into contiguous (start, end) ranges."""
+    size, extra = divmod(page_count, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _iter_rendered(pdf_path: str, dpi: int, jpg_quality: int, max_workers: Optional[int]) -> Iterator[bytes]:
+    """Render all pages of a PDF to JPEG, yielding them in page order.
+
+    Larger documents are rendered in parallel by up to ``max_workers``
+    processes (default: one per CPU) in small contiguous ranges, so the first
+    pages are available long before the last ones are rendered. Only a few
+    ranges per worker are rendered ahead of the consumer, so a slow consumer
+    also slows rendering down instead of having every page held in memory.
+    """
+    with fitz.open(pdf_path) as pdf_document:
+        page_count = len(pdf_document)
+        workers = min(max_workers or os.cpu_count() or 1, page_count)
+        if workers <= 1 or page_count < MIN_PAGES_FOR_POOL:
+            # Not worth starting a process pool; render from the already open document
+            matrix = fitz.Matrix(dpi / 72, dpi / 72)
+            for page_num in tqdm(range(page_count), desc="Converting PDF to images", unit="page"):
+                yield _render_page(pdf_document, page_num, matrix, jpg_quality)
+            return
+
+    shards = iter(_split_pages(page_count, math.ceil(page_count / PAGES_PER_SHARD)))
+    # Spawn rather than fork: the caller may be a multi-threaded Qt process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+
+        def submit_next() -> bool:
+            shard = next(shards, None)
+            if shard is None:
+                return False
+            pending.append(executor.submit(_render_shard, pdf_path, *shard, dpi, jpg_quality))
+            return True
+
+        pending = deque()
+        for _ in range(workers * SHARDS_AHEAD_PER_WORKER):
+            if not submit_next():
+                break
+        try:
+            with tqdm(total=page_count, desc="Converting PDF to images", unit="page") as progress:
+                while pending:
+                    results = pending.popleft().result()
+                    # Keep the window full while these pages are consumed
+                    submit_next()
+                    progress.update(len(results))
+                    yield from results
+        finally:
+            # Don't render the remaining pages if the caller stopped early
+            executor.shutdown(cancel_futures=True)
+
+
 class PDFProcessor:
     @staticmethod
-    def convert_pdf_to_images(pdf_path: str, output_dir: str = None) -> List[str]:
-        """Convert PDF to images, returns list of image paths with sequential numbering."""
-        # If no output directory specified, create a temp directory
-        if not output_dir:
-            output_dir = tempfile.mkdtemp()
-        else:
-            os.makedirs(output_dir, exist_ok=True)
-            
-        # Open the PDF file
-        pdf_document = fitz.open(pdf_path)
-        image_paths = []
-        
-        # Iterate through pages and convert to images
-        for page_num in tqdm(range(len(pdf_document)), desc="Converting PDF to images", unit="page"):
-            page = pdf_document.load_page(page_num)
-            
-            # Render page to an image with a higher resolution (300 DPI)
-            pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
-            
-            # Generate image file path with sequential numbering
-            image_path = os.path.join(output_dir, f"page_{page_num + 1:03d}.png")
-            
-            # Save the image
-            pix.save(image_path)
-            image_paths.append(image_path)
-            
-        pdf_document.close()
-        return image_paths
-        
+    def get_page_count(pdf_path: str) -> int:
+        """Return the number of pages in a PDF."""
+        with fitz.open(pdf_path) as pdf_document:
+            return len(pdf_document)
+
     @staticmethod
-    def load_image(image_path: str) -> bytes:
-        """Load image from path and return as bytes."""
-        with Image.open(image_path) as img:
-            # Convert to RGB if image is in RGBA mode (has transparency)
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-                
-            # Create a bytes buffer and save the image to it
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=95)
-            
-            # Get the bytes from the buffer
-            image_bytes = buffer.getvalue()
-            
-        return image_bytes
\ No newline at end of file
+    def iter_pdf_page_jpegs(
+        pdf_path: str, dpi: int = 300, jpg_quality: int = 85, max_workers: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Render PDF pages to JPEG bytes in memory, yielding them in page order."""
+        return _iter_rendered(pdf_path, dpi, jpg_quality, max_workers)